@@ -2,12 +2,17 @@ import streamlit as st
 import pandas as pd
 from datetime import date, datetime
 from io import BytesIO
-import json
-from collections import defaultdict
 import hashlib
 import re
 import zipfile
 import uuid
+import os
+from pathlib import Path
+
+from fx_rates import FileRateBackend, HttpRateBackend, RateProvider
+from trip_cache import TripCache, TripSnapshot, own_trip, share_snapshot
+from trip_file import TripFileError, build_save_bytes, load_trip_bytes
+from settlement import compute_settlement_timeline, timeline_balance_col
 
 # -------------------------------
 # Excel 엔진 가용성 체크 (xlsxwriter 말고 openpyxl)
@@ -109,6 +114,7 @@ ss_setdefault("trip_name_ui", "나의 여행")
 ss_setdefault("participants", [])
 ss_setdefault("expenses", [])
 ss_setdefault("rates", {"KRW": 1.0, "USD": 1350.0, "JPY": 9.2, "EUR": 1450.0})
+ss_setdefault("manual_rates", dict(st.session_state.rates))
 
 ss_setdefault("last_loaded_sig", None)
 ss_setdefault("toast_msg", None)
@@ -120,6 +126,12 @@ ss_setdefault("last_saved_filename", None)
 ss_setdefault("ui_nonce", 0)
 ss_setdefault("editing_id", None)
 
+ss_setdefault("trip_rev", 0)
+ss_setdefault("trip_shared", False)
+ss_setdefault("trip_snapshot", None)
+ss_setdefault("save_compressed", False)
+ss_setdefault("auto_rates", False)
+
 # -------------------------------
 # 토스트
 # -------------------------------
@@ -137,14 +149,42 @@ def flush_toast():
 # -------------------------------
 # 유틸
 # -------------------------------
-def to_json_bytes(data: dict) -> BytesIO:
-    buf = BytesIO()
-    buf.write(json.dumps(data, ensure_ascii=False, indent=2).encode("utf-8"))
-    buf.seek(0)
-    return buf
+def bump_trip_rev():
+    # 여행 데이터(참여자/지출)가 바뀔 때마다 호출 → 스냅샷 캐시 무효화
+    st.session_state.trip_rev += 1
+
+def begin_trip_edit():
+    # copy-on-write: 공유 스냅샷을 보고 있으면 수정 전에 이 세션 전용 사본을 만든다
+    own_trip(st.session_state)
+    bump_trip_rev()
+
+def adopt_snapshot(snap: TripSnapshot):
+    share_snapshot(st.session_state, snap)
+    st.session_state.trip_snapshot = (st.session_state.trip_rev, snap)
+
+def current_trip_snapshot() -> TripSnapshot:
+    # 리비전당 한 번만 해시 → 같은 내용의 여행은 모든 세션이 같은 스냅샷을 공유 (여행 이름 무관)
+    cached = st.session_state.trip_snapshot
+    if cached is not None and cached[0] == st.session_state.trip_rev:
+        return cached[1]
+    snap = get_trip_cache().intern(st.session_state.participants, st.session_state.expenses)
+    adopt_snapshot(snap)
+    return snap
+
+def trip_save_bytes(compressed: bool = False) -> bytes:
+    # 저장 파일만 여행 이름에 의존 → 이름은 variant로 넘겨 이름이 바뀌면 이 결과만 다시 만든다
+    snap = current_trip_snapshot()
+    trip_name = st.session_state.trip_name_ui
+    return get_trip_cache().derive(
+        snap, ("save", compressed),
+        lambda: build_save_bytes(trip_name, snap.participants, snap.expenses, compressed),
+        variant=trip_name,
+    )
 
-def ensure_expense_ids():
-    for e in st.session_state.expenses:
+EXPENSE_DEFAULT_KEYS = ("created_at", "payer_only", "beneficiary", "memo", "currency", "amount", "amount_krw")
+
+def normalize_expenses(expenses: list[dict]):
+    for e in expenses:
         if "id" not in e or not e["id"]:
             e["id"] = uuid.uuid4().hex
         e.setdefault("created_at", datetime.now().isoformat())
@@ -155,6 +195,12 @@ def ensure_expense_ids():
         e.setdefault("amount", 0.0)
         e.setdefault("amount_krw", 0)
 
+def ensure_expense_ids():
+    if all(e.get("id") and all(k in e for k in EXPENSE_DEFAULT_KEYS) for e in st.session_state.expenses):
+        return
+    begin_trip_edit()
+    normalize_expenses(st.session_state.expenses)
+
 def parse_amount_text(s: str) -> float:
     if s is None:
         raise ValueError("금액을 입력해 주세요.")
@@ -169,80 +215,7 @@ def parse_amount_text(s: str) -> float:
         raise ValueError("금액은 0보다 커야 합니다.")
     return v
 
-def split_amount_exact(amount: int, people: list[str]) -> dict[str, int]:
-    n = len(people)
-    if n <= 0:
-        return {}
-    base = amount // n
-    rem = amount % n
-    shares = {p: base for p in people}
-    for i in range(rem):
-        shares[people[i]] += 1
-    return shares
-
-def compute_settlement(participants: list[str], expenses: list[dict]):
-    paid = defaultdict(int)
-    owed = defaultdict(int)
-
-    for e in expenses:
-        amt = int(e.get("amount_krw", 0))
-        payer = e.get("payer", "")
-        display_ps = e.get("participants", [])
-        payer_only = bool(e.get("payer_only", False))
-        beneficiary = (e.get("beneficiary") or "").strip()
-
-        if beneficiary:
-            split_ps = [beneficiary]
-        elif payer_only:
-            split_ps = [payer]
-        else:
-            split_ps = display_ps
-
-        if not split_ps:
-            continue
-
-        paid[payer] += amt
-        shares = split_amount_exact(amt, split_ps)
-        for p, s in shares.items():
-            owed[p] += s
-
-    rows = []
-    for p in participants:
-        rows.append({
-            "이름": p,
-            "낸 금액": int(paid[p]),
-            "부담금": int(owed[p]),
-            "차액(낸-부담)": int(paid[p] - owed[p]),
-        })
-    summary_df = pd.DataFrame(rows)
-
-    senders = []
-    receivers = []
-    for r in rows:
-        diff = r["차액(낸-부담)"]
-        if diff < 0:
-            senders.append([r["이름"], -diff])
-        elif diff > 0:
-            receivers.append([r["이름"], diff])
-
-    transfers = []
-    i = j = 0
-    while i < len(senders) and j < len(receivers):
-        s_name, s_amt = senders[i]
-        r_name, r_amt = receivers[j]
-        send = min(s_amt, r_amt)
-        transfers.append({"보내는 사람": s_name, "받는 사람": r_name, "금액(원)": int(send)})
-        senders[i][1] -= send
-        receivers[j][1] -= send
-        if senders[i][1] == 0:
-            i += 1
-        if receivers[j][1] == 0:
-            j += 1
-
-    transfers_df = pd.DataFrame(transfers) if transfers else pd.DataFrame(columns=["보내는 사람", "받는 사람", "금액(원)"])
-    return summary_df, transfers_df
-
-def make_excel(expenses_df: pd.DataFrame, summary_df: pd.DataFrame, transfers_df: pd.DataFrame) -> BytesIO:
+def make_excel(expenses_df: pd.DataFrame, summary_df: pd.DataFrame, transfers_df: pd.DataFrame, timeline_df: pd.DataFrame | None = None) -> BytesIO:
     if not OPENPYXL_OK:
         raise ModuleNotFoundError("openpyxl")
     buf = BytesIO()
@@ -250,18 +223,35 @@ def make_excel(expenses_df: pd.DataFrame, summary_df: pd.DataFrame, transfers_df
         expenses_df.to_excel(writer, index=False, sheet_name="지출내역")
         summary_df.to_excel(writer, index=False, sheet_name="정산결과")
         transfers_df.to_excel(writer, index=False, sheet_name="송금안내")
+        if timeline_df is not None:
+            timeline_df.to_excel(writer, index=False, sheet_name="날짜별추이")
     buf.seek(0)
     return buf
 
-def make_csv_zip(expenses_df: pd.DataFrame, summary_df: pd.DataFrame, transfers_df: pd.DataFrame) -> BytesIO:
+def make_csv_zip(expenses_df: pd.DataFrame, summary_df: pd.DataFrame, transfers_df: pd.DataFrame, timeline_df: pd.DataFrame | None = None) -> BytesIO:
     buf = BytesIO()
     with zipfile.ZipFile(buf, "w", zipfile.ZIP_DEFLATED) as zf:
         zf.writestr("지출내역.csv", expenses_df.to_csv(index=False, encoding="utf-8-sig"))
         zf.writestr("정산결과.csv", summary_df.to_csv(index=False, encoding="utf-8-sig"))
         zf.writestr("송금안내.csv", transfers_df.to_csv(index=False, encoding="utf-8-sig"))
+        if timeline_df is not None:
+            zf.writestr("날짜별추이.csv", timeline_df.to_csv(index=False, encoding="utf-8-sig"))
     buf.seek(0)
     return buf
 
+def compute_category_stats(expenses: list[dict]):
+    exp_df_stat = pd.DataFrame(expenses)
+    if exp_df_stat.empty or "category" not in exp_df_stat.columns:
+        return None
+    cat_df = (
+        exp_df_stat.groupby("category", as_index=False)["amount_krw"]
+        .sum()
+        .rename(columns={"category": "항목", "amount_krw": "총액(원)"})
+        .sort_values("총액(원)", ascending=False)
+    )
+    total_all = int(exp_df_stat["amount_krw"].sum()) if "amount_krw" in exp_df_stat.columns else 0
+    return cat_df, total_all
+
 def total_spent_krw() -> int:
     return int(sum(int(e.get("amount_krw", 0)) for e in st.session_state.expenses))
 
@@ -280,6 +270,40 @@ def find_expense(exp_id: str):
             return e
     return None
 
+# -------------------------------
+# 프로세스 공용 리소스 (여행 캐시 / 자동 환율 공급자)
+# -------------------------------
+FX_CURRENCIES = ["USD", "JPY", "EUR"]
+
+@st.cache_resource
+def get_trip_cache() -> TripCache:
+    # 같은 여행을 연 여러 세션이 스냅샷과 정산/통계/내보내기 결과를 공유
+    return TripCache(max_bytes=int(os.environ.get("TRIP_CACHE_MAX_MB", "256")) * 1024 * 1024)
+
+@st.cache_resource
+def get_rate_provider() -> RateProvider:
+    # FX_RATES_URL이 있으면 HTTP, 없으면 로컬 파일(FX_RATES_FILE 또는 fx_rates.json)
+    url = os.environ.get("FX_RATES_URL")
+    if url:
+        backend = HttpRateBackend(url)
+    else:
+        backend = FileRateBackend(os.environ.get("FX_RATES_FILE", Path(__file__).with_name("fx_rates.json")))
+    # FX_RATES_MAX_AGE(초)보다 오래된 환율은 갱신이 계속 실패해도 쓰지 않고 수동 입력값으로
+    return RateProvider(
+        backend,
+        ttl=float(os.environ.get("FX_RATES_TTL", "600")),
+        max_age=float(os.environ.get("FX_RATES_MAX_AGE", "86400")),
+    )
+
+def format_rate_age(seconds: float) -> str:
+    if seconds < 60:
+        return "방금"
+    if seconds < 3600:
+        return f"{int(seconds // 60)}분 전"
+    if seconds < 86400:
+        return f"{int(seconds // 3600)}시간 전"
+    return f"{int(seconds // 86400)}일 전"
+
 # -------------------------------
 # 저장 파일명 동기화
 # -------------------------------
@@ -302,26 +326,39 @@ with st.sidebar:
     # (삭제됨)
 
     st.markdown("### 💾 여행 파일")
-    uploaded = st.file_uploader("여행 파일 불러오기 (JSON)", type=["json"], key="trip_uploader_sidebar")
+    uploaded = st.file_uploader("여행 파일 불러오기 (JSON / JSON.GZ)", type=["json", "gz"], key="trip_uploader_sidebar")
     if uploaded is not None:
         raw = uploaded.getvalue()
         sig = hashlib.sha256(raw).hexdigest()
         if st.session_state.last_loaded_sig != sig:
-            data = json.loads(raw.decode("utf-8"))
-            st.session_state.trip_name_ui = data.get("trip_name", "불러온_여행")
-            st.session_state.participants = data.get("participants", [])
-            st.session_state.expenses = data.get("expenses", [])
-            ensure_expense_ids()
-            st.session_state.last_loaded_sig = sig
 
-            if not st.session_state.save_filename_touched:
-                st.session_state.save_filename_ui = st.session_state.trip_name_ui
-
-            st.session_state.editing_id = None
-            st.session_state.ui_nonce += 1
+            def load_trip():
+                data = load_trip_bytes(raw)
+                expenses = data.get("expenses", [])
+                normalize_expenses(expenses)
+                return data.get("trip_name", "불러온_여행"), data.get("participants", []), expenses
+
+            # 같은 파일을 연 세션끼리는 같은 스냅샷(같은 지출 id)을 공유
+            try:
+                snap, loaded_name = get_trip_cache().load(sig, load_trip)
+            except TripFileError as e:
+                snap = None
+                st.error(f"여행 파일을 불러오지 못했습니다: {e}")
+
+            if snap is not None:
+                st.session_state.trip_name_ui = loaded_name
+                bump_trip_rev()
+                adopt_snapshot(snap)
+                st.session_state.last_loaded_sig = sig
+
+                if not st.session_state.save_filename_touched:
+                    st.session_state.save_filename_ui = st.session_state.trip_name_ui
+
+                st.session_state.editing_id = None
+                st.session_state.ui_nonce += 1
 
-            queue_toast("여행 파일을 불러왔어요 ✅")
-            st.rerun()
+                queue_toast("여행 파일을 불러왔어요 ✅")
+                st.rerun()
 
     st.text_input("저장 파일명 (확장자 제외)", key="save_filename_ui", on_change=on_save_filename_change)
 
@@ -334,17 +371,14 @@ with st.sidebar:
 
     can_download = (not same_as_last) or confirm_overwrite
 
-    payload = {
-        "trip_name": st.session_state.trip_name_ui,
-        "participants": st.session_state.participants,
-        "expenses": st.session_state.expenses,
-    }
+    save_compressed = st.checkbox("🗜️ 압축 저장 (gzip)", key="save_compressed")
+    save_ext = "json.gz" if save_compressed else "json"
 
     if st.download_button(
-        "📥 여행 파일 저장 (JSON)",
-        data=to_json_bytes(payload),
-        file_name=f"{current_save_name}.json",
-        mime="application/json",
+        "📥 여행 파일 저장 (JSON.GZ)" if save_compressed else "📥 여행 파일 저장 (JSON)",
+        data=trip_save_bytes(compressed=save_compressed),
+        file_name=f"{current_save_name}.{save_ext}",
+        mime="application/gzip" if save_compressed else "application/json",
         use_container_width=True,
         disabled=not can_download,
     ):
@@ -360,6 +394,7 @@ with st.sidebar:
         if add and name:
             if name not in st.session_state.participants:
                 if len(st.session_state.participants) < 8:
+                    begin_trip_edit()
                     st.session_state.participants.append(name)
                     st.session_state.ui_nonce += 1
                     queue_toast("참여자가 추가되었습니다 ✅")
@@ -376,10 +411,33 @@ with st.sidebar:
     st.divider()
 
     st.markdown("### 💱 환율 (KRW 기준)")
-    r_usd = st.number_input("USD", value=float(st.session_state.rates.get("USD", 1350.0)), step=10.0)
-    r_jpy = st.number_input("JPY", value=float(st.session_state.rates.get("JPY", 9.2)), step=0.1)
-    r_eur = st.number_input("EUR", value=float(st.session_state.rates.get("EUR", 1450.0)), step=10.0)
-    st.session_state.rates = {"KRW": 1.0, "USD": float(r_usd), "JPY": float(r_jpy), "EUR": float(r_eur)}
+    r_usd = st.number_input("USD", value=float(st.session_state.manual_rates.get("USD", 1350.0)), step=10.0)
+    r_jpy = st.number_input("JPY", value=float(st.session_state.manual_rates.get("JPY", 9.2)), step=0.1)
+    r_eur = st.number_input("EUR", value=float(st.session_state.manual_rates.get("EUR", 1450.0)), step=10.0)
+    manual_rates = {"KRW": 1.0, "USD": float(r_usd), "JPY": float(r_jpy), "EUR": float(r_eur)}
+    st.session_state.manual_rates = manual_rates
+
+    # 자동 환율: 캐시된 값만 즉시 사용하고 갱신은 백그라운드에서 (실패/미수신 시 수동 입력값)
+    auto_rates = st.checkbox("🌐 자동 환율 사용", key="auto_rates")
+    if auto_rates:
+        provider = get_rate_provider()
+        fetched = provider.get_rates(FX_CURRENCIES)
+        fx_status = provider.status(FX_CURRENCIES)
+        st.session_state.rates = {**manual_rates, **fetched}
+        missing = [c for c in FX_CURRENCIES if c not in fetched]
+        if fetched:
+            st.caption("자동 환율 적용: " + ", ".join(
+                f"{c} {v:,.2f} ({format_rate_age(fx_status[c]['age'])})" for c, v in fetched.items()
+            ))
+        if missing:
+            st.caption("수동 입력값 사용: " + ", ".join(
+                f"{c} (자동 환율 만료)" if fx_status[c]["expired"] else c for c in missing
+            ))
+        failing = [c for c in FX_CURRENCIES if fx_status[c]["error"]]
+        if failing:
+            st.warning("환율 갱신 실패: " + ", ".join(failing) + " — 마지막 값 또는 수동 입력값을 사용합니다.")
+    else:
+        st.session_state.rates = manual_rates
 
 # -------------------------------
 # 메인 UI
@@ -491,6 +549,7 @@ if st.session_state.expenses:
                 st.warning("삭제할 항목을 선택해 주세요.")
             else:
                 delete_ids = set(id_order[i] for i in selected_idx)
+                begin_trip_edit()
                 st.session_state.expenses = [e for e in st.session_state.expenses if e.get("id") not in delete_ids]
                 if st.session_state.editing_id in delete_ids:
                     st.session_state.editing_id = None
@@ -629,6 +688,7 @@ with st.form(f"expense_form_{ui_nonce}", clear_on_submit=False):
             "memo": memo,
         }
 
+        begin_trip_edit()
         if editing:
             for i, e in enumerate(st.session_state.expenses):
                 if e.get("id") == target["id"]:
@@ -650,7 +710,12 @@ with st.form(f"expense_form_{ui_nonce}", clear_on_submit=False):
 # 정산 결과 + 송금 안내
 # -------------------------------
 st.subheader("📊 정산 결과")
-summary_df, transfers_df = compute_settlement(st.session_state.participants, st.session_state.expenses)
+trip_cache = get_trip_cache()
+trip_snap = current_trip_snapshot()
+summary_df, transfers_df, timeline_df = trip_cache.derive(
+    trip_snap, "settlement",
+    lambda: compute_settlement_timeline(trip_snap.participants, trip_snap.expenses),
+)
 
 show_summary = summary_df.copy()
 for col in ["낸 금액", "부담금", "차액(낸-부담)"]:
@@ -665,22 +730,26 @@ else:
     show_trans["금액(원)"] = show_trans["금액(원)"].apply(lambda x: f"{int(x):,}")
     st.dataframe(show_trans, use_container_width=True)
 
+st.subheader("📅 날짜별 정산 추이")
+if timeline_df.empty:
+    st.info("지출이 없어서 정산 추이를 표시할 수 없습니다.")
+else:
+    st.caption("각 날짜가 끝난 시점의 누적 차액(낸-부담)과, 그 시점에 정산한다면 필요한 송금입니다.")
+    show_timeline = timeline_df.copy()
+    for p in st.session_state.participants:
+        col = timeline_balance_col(p)
+        show_timeline[col] = show_timeline[col].apply(lambda x: f"{int(x):,}")
+    st.dataframe(show_timeline, use_container_width=True, hide_index=True)
+
 # -------------------------------
 # ✅ 항목별 지출 통계 (다운로드 위에 표시)
 # -------------------------------
 st.subheader("📌 항목별 지출 총액")
 
 if st.session_state.expenses:
-    exp_df_stat = pd.DataFrame(st.session_state.expenses)
-    if not exp_df_stat.empty and "category" in exp_df_stat.columns:
-        cat_df = (
-            exp_df_stat.groupby("category", as_index=False)["amount_krw"]
-            .sum()
-            .rename(columns={"category": "항목", "amount_krw": "총액(원)"})
-            .sort_values("총액(원)", ascending=False)
-        )
-
-        total_all = int(exp_df_stat["amount_krw"].sum()) if "amount_krw" in exp_df_stat.columns else 0
+    cat_stats = trip_cache.derive(trip_snap, "category_stats", lambda: compute_category_stats(trip_snap.expenses))
+    if cat_stats is not None:
+        cat_df, total_all = cat_stats
         cat_df_show = cat_df.copy()
         cat_df_show["총액(원)"] = cat_df_show["총액(원)"].apply(lambda x: f"{int(x):,}")
 
@@ -704,17 +773,24 @@ else:
 # -------------------------------
 st.subheader("📥 다운로드")
 
-expenses_df = pd.DataFrame(st.session_state.expenses)
-if expenses_df.empty:
-    expenses_df = pd.DataFrame(columns=[
-        "id","date","category","payer","currency","amount","amount_krw","participants",
-        "payer_only","beneficiary","memo","created_at","updated_at"
-    ])
+def build_expenses_df() -> pd.DataFrame:
+    df = pd.DataFrame(trip_snap.expenses)
+    if df.empty:
+        df = pd.DataFrame(columns=[
+            "id","date","category","payer","currency","amount","amount_krw","participants",
+            "payer_only","beneficiary","memo","created_at","updated_at"
+        ])
+    return df
+
+expenses_df = trip_cache.derive(trip_snap, "expenses_df", build_expenses_df)
 
 if OPENPYXL_OK:
     st.download_button(
         "📊 엑셀 다운로드 (지출/정산/송금)",
-        data=make_excel(expenses_df, summary_df, transfers_df),
+        data=trip_cache.derive(
+            trip_snap, "excel",
+            lambda: make_excel(expenses_df, summary_df, transfers_df, timeline_df).getvalue(),
+        ),
         file_name=f"{st.session_state.trip_name_ui}.xlsx",
         use_container_width=True
     )
@@ -722,7 +798,10 @@ else:
     st.warning("현재 서버에 openpyxl이 없어 엑셀 다운로드가 비활성입니다. 대신 CSV ZIP을 내려받을 수 있어요.")
     st.download_button(
         "📦 CSV ZIP 다운로드 (지출/정산/송금)",
-        data=make_csv_zip(expenses_df, summary_df, transfers_df),
+        data=trip_cache.derive(
+            trip_snap, "csv_zip",
+            lambda: make_csv_zip(expenses_df, summary_df, transfers_df, timeline_df).getvalue(),
+        ),
         file_name=f"{st.session_state.trip_name_ui}_csv.zip",
         use_container_width=True
     )
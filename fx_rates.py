@@ -0,0 +1,178 @@
+import asyncio
+import json
+import math
+import threading
+import time
+import urllib.request
+from pathlib import Path
+
+# -------------------------------
+# 환율 백엔드 (KRW 기준: 1 단위 외화 = N 원)
+# -------------------------------
+class FileRateBackend:
+    """로컬 JSON 파일에서 환율을 읽는 백엔드. 예: {"USD": 1350.0, "JPY": 9.2}"""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self._parsed = None
+        self._parsed_stamp = None
+        self._read_lock = threading.Lock()
+
+    async def fetch(self, currency: str) -> float:
+        data = await asyncio.to_thread(self._read)
+        return float(data[currency])
+
+    def _read(self) -> dict:
+        # 통화별 fetch가 동시에 불려도 파일은 바뀌었을 때만 한 번 읽어서 파싱
+        with self._read_lock:
+            st = self.path.stat()
+            stamp = (st.st_mtime_ns, st.st_size)
+            if self._parsed_stamp != stamp:
+                self._parsed = json.loads(self.path.read_text(encoding="utf-8"))
+                self._parsed_stamp = stamp
+            return self._parsed
+
+
+class HttpRateBackend:
+    """URL에서 환율을 받아오는 백엔드. url_template의 {currency}를 통화 코드로 치환.
+
+    응답은 숫자 하나 또는 {"rate": 1350.0} / {"USD": 1350.0} 형태의 JSON.
+    """
+
+    def __init__(self, url_template: str, timeout: float = 5.0):
+        self.url_template = url_template
+        self.timeout = timeout
+
+    async def fetch(self, currency: str) -> float:
+        url = self.url_template.format(currency=currency)
+        data = await asyncio.to_thread(self._get, url)
+        if isinstance(data, dict):
+            data = data.get("rate", data.get(currency))
+        return float(data)
+
+    def _get(self, url: str):
+        with urllib.request.urlopen(url, timeout=self.timeout) as resp:
+            return json.loads(resp.read().decode("utf-8"))
+
+
+def valid_rate(value) -> float:
+    # NaN/무한대/0/음수 환율은 금액 계산을 망가뜨리므로 실패로 취급
+    rate = float(value)
+    if not (math.isfinite(rate) and rate > 0):
+        raise ValueError(f"invalid rate: {value!r}")
+    return rate
+
+
+# -------------------------------
+# 비동기 환율 공급자 (TTL 캐시 + stale-while-revalidate)
+# -------------------------------
+class RateProvider:
+    """백그라운드 이벤트 루프에서 환율을 동시에 가져와 캐시하는 공급자.
+
+    get_rates()는 절대 네트워크를 기다리지 않는다. 캐시에 있는 값을 즉시
+    돌려주고(만료됐어도), 만료/누락된 통화는 백그라운드에서 새로 가져온다.
+    실패하면 마지막 캐시 값이 유지되지만, max_age보다 오래된 값은 돌려주지
+    않는다. 결과에서 빠진 통화는 호출하는 쪽에서 수동 입력값으로 대체하면
+    된다. 값의 나이와 마지막 오류는 status()로 확인한다.
+    """
+
+    def __init__(self, backend, ttl: float = 600.0, retry_after: float = 30.0, max_age: float | None = None):
+        self.backend = backend
+        self.ttl = ttl
+        self.retry_after = retry_after
+        self.max_age = max_age
+        self._cache: dict[str, tuple[float, float]] = {}
+        self._errors: dict[str, str] = {}
+        self._failed_at: dict[str, float] = {}
+        self._inflight: set[str] = set()
+        self._lock = threading.Lock()
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name="fx-rate-provider", daemon=True)
+        self._thread.start()
+
+    def get_rates(self, currencies) -> dict[str, float]:
+        now = time.monotonic()
+        rates = {}
+        stale = []
+        with self._lock:
+            for c in currencies:
+                hit = self._cache.get(c)
+                if hit is not None and (self.max_age is None or now - hit[1] <= self.max_age):
+                    rates[c] = hit[0]
+                if hit is not None and now - hit[1] < self.ttl:
+                    continue
+                if c in self._inflight or now - self._failed_at.get(c, -self.retry_after) < self.retry_after:
+                    continue
+                stale.append(c)
+            self._inflight.update(stale)
+        if stale:
+            asyncio.run_coroutine_threadsafe(self._refresh(stale), self._loop)
+        return rates
+
+    def refresh(self, currencies, timeout: float | None = None) -> dict[str, float]:
+        # 캐시 상태와 무관하게 즉시 다시 가져오고 끝날 때까지 기다림 (테스트/초기 로딩용)
+        with self._lock:
+            self._inflight.update(currencies)
+        future = asyncio.run_coroutine_threadsafe(self._refresh(list(currencies)), self._loop)
+        future.result(timeout)
+        with self._lock:
+            return {c: self._cache[c][0] for c in currencies if c in self._cache}
+
+    def last_errors(self) -> dict[str, str]:
+        with self._lock:
+            return dict(self._errors)
+
+    def status(self, currencies) -> dict[str, dict]:
+        """통화별 {"rate", "age"(초, 없으면 None), "expired", "error"}."""
+        now = time.monotonic()
+        result = {}
+        with self._lock:
+            for c in currencies:
+                hit = self._cache.get(c)
+                age = now - hit[1] if hit is not None else None
+                result[c] = {
+                    "rate": hit[0] if hit is not None else None,
+                    "age": age,
+                    "expired": age is not None and self.max_age is not None and age > self.max_age,
+                    "error": self._errors.get(c),
+                }
+        return result
+
+    def close(self):
+        # 진행 중인 갱신을 취소한 뒤 루프 종료
+        future = asyncio.run_coroutine_threadsafe(self._cancel_pending(), self._loop)
+        try:
+            future.result(1.0)
+        finally:
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join(timeout=1.0)
+            if not self._thread.is_alive():
+                self._loop.close()
+
+    async def _cancel_pending(self):
+        tasks = [t for t in asyncio.all_tasks() if t is not asyncio.current_task()]
+        for t in tasks:
+            t.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _refresh(self, currencies: list[str]):
+        results = await asyncio.gather(
+            *(self.backend.fetch(c) for c in currencies),
+            return_exceptions=True,
+        )
+        now = time.monotonic()
+        with self._lock:
+            for c, r in zip(currencies, results):
+                self._inflight.discard(c)
+                if not isinstance(r, BaseException):
+                    try:
+                        r = valid_rate(r)
+                    except (TypeError, ValueError) as e:
+                        r = e
+                if isinstance(r, BaseException):
+                    self._errors[c] = f"{type(r).__name__}: {r}"
+                    self._failed_at[c] = now
+                    continue
+                self._cache[c] = (r, now)
+                self._errors.pop(c, None)
+                self._failed_at.pop(c, None)
@@ -0,0 +1,111 @@
+from collections import defaultdict
+
+import pandas as pd
+
+# -------------------------------
+# 정산 계산 (Streamlit 없이 import 가능)
+# -------------------------------
+def split_amount_exact(amount: int, people: list[str]) -> dict[str, int]:
+    n = len(people)
+    if n <= 0:
+        return {}
+    base = amount // n
+    rem = amount % n
+    shares = {p: base for p in people}
+    for i in range(rem):
+        shares[people[i]] += 1
+    return shares
+
+
+def settle_transfers(balances: list[tuple[str, int]]) -> list[dict]:
+    senders = []
+    receivers = []
+    for name, diff in balances:
+        if diff < 0:
+            senders.append([name, -diff])
+        elif diff > 0:
+            receivers.append([name, diff])
+
+    transfers = []
+    i = j = 0
+    while i < len(senders) and j < len(receivers):
+        s_name, s_amt = senders[i]
+        r_name, r_amt = receivers[j]
+        send = min(s_amt, r_amt)
+        transfers.append({"보내는 사람": s_name, "받는 사람": r_name, "금액(원)": int(send)})
+        senders[i][1] -= send
+        receivers[j][1] -= send
+        if senders[i][1] == 0:
+            i += 1
+        if receivers[j][1] == 0:
+            j += 1
+    return transfers
+
+
+def timeline_balance_col(name: str) -> str:
+    # 참여자 열은 항상 " 차액"으로 끝나므로 고정 열("날짜", "송금 안내")과 겹치지 않음
+    return f"{name} 차액"
+
+
+def compute_settlement_timeline(participants: list[str], expenses: list[dict]):
+    # 날짜별 증감(delta)만 모은 뒤 누적합으로 하루씩 진행 → 날짜마다 정산을 다시 돌리지 않음
+    day_paid = defaultdict(lambda: defaultdict(int))
+    day_owed = defaultdict(lambda: defaultdict(int))
+
+    for e in expenses:
+        amt = int(e.get("amount_krw", 0))
+        payer = e.get("payer", "")
+        display_ps = e.get("participants", [])
+        payer_only = bool(e.get("payer_only", False))
+        beneficiary = (e.get("beneficiary") or "").strip()
+
+        if beneficiary:
+            split_ps = [beneficiary]
+        elif payer_only:
+            split_ps = [payer]
+        else:
+            split_ps = display_ps
+
+        if not split_ps:
+            continue
+
+        d = e.get("date", "")
+        day_paid[d][payer] += amt
+        shares = split_amount_exact(amt, split_ps)
+        for p, s in shares.items():
+            day_owed[d][p] += s
+
+    paid = defaultdict(int)
+    owed = defaultdict(int)
+    timeline = []
+    for d in sorted(set(day_paid) | set(day_owed)):
+        for p, v in day_paid[d].items():
+            paid[p] += v
+        for p, v in day_owed[d].items():
+            owed[p] += v
+
+        balances = [(p, int(paid[p] - owed[p])) for p in participants]
+        transfers = settle_transfers(balances)
+        row = {"날짜": d}
+        row.update({timeline_balance_col(p): diff for p, diff in balances})
+        row["송금 안내"] = " / ".join(
+            f"{t['보내는 사람']}→{t['받는 사람']} {t['금액(원)']:,}" for t in transfers
+        )
+        timeline.append(row)
+
+    rows = []
+    for p in participants:
+        rows.append({
+            "이름": p,
+            "낸 금액": int(paid[p]),
+            "부담금": int(owed[p]),
+            "차액(낸-부담)": int(paid[p] - owed[p]),
+        })
+    summary_df = pd.DataFrame(rows)
+
+    transfers = settle_transfers([(r["이름"], r["차액(낸-부담)"]) for r in rows])
+    transfers_df = pd.DataFrame(transfers) if transfers else pd.DataFrame(columns=["보내는 사람", "받는 사람", "금액(원)"])
+    timeline_df = pd.DataFrame(timeline) if timeline else pd.DataFrame(
+        columns=["날짜", *(timeline_balance_col(p) for p in participants), "송금 안내"]
+    )
+    return summary_df, transfers_df, timeline_df
@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# app.py 옆의 모듈(fx_rates, trip_cache)을 Streamlit 없이 import
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
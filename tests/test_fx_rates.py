@@ -0,0 +1,222 @@
+import asyncio
+import http.server
+import json
+import threading
+import time
+
+import pytest
+
+from fx_rates import FileRateBackend, HttpRateBackend, RateProvider
+
+
+class GatedFileBackend(FileRateBackend):
+    """FileRateBackend와 같지만, gate가 열릴 때까지 fetch를 붙잡고 호출 횟수를 센다."""
+
+    def __init__(self, path):
+        super().__init__(path)
+        self.gate = threading.Event()
+        self.gate.set()
+        self.calls = 0
+
+    async def fetch(self, currency: str) -> float:
+        self.calls += 1
+        await asyncio.to_thread(self.gate.wait, 5.0)
+        return await super().fetch(currency)
+
+
+def wait_until(pred, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if pred():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+@pytest.fixture
+def rates_file(tmp_path):
+    path = tmp_path / "fx_rates.json"
+    path.write_text(json.dumps({"USD": 1350.0, "JPY": 9.2}), encoding="utf-8")
+    return path
+
+
+@pytest.fixture
+def make_provider():
+    providers = []
+
+    def make(backend, **kwargs):
+        p = RateProvider(backend, **kwargs)
+        providers.append(p)
+        return p
+
+    yield make
+    for p in providers:
+        p.close()
+
+
+def test_cold_cache_returns_empty_without_blocking(rates_file, make_provider):
+    backend = GatedFileBackend(rates_file)
+    backend.gate.clear()
+    provider = make_provider(backend)
+
+    started = time.monotonic()
+    assert provider.get_rates(["USD", "JPY"]) == {}
+    assert time.monotonic() - started < 0.5
+
+    backend.gate.set()
+    assert wait_until(lambda: provider.get_rates(["USD", "JPY"]) == {"USD": 1350.0, "JPY": 9.2})
+
+
+def test_stale_value_served_while_refreshing(rates_file, make_provider):
+    backend = GatedFileBackend(rates_file)
+    provider = make_provider(backend, ttl=0.0)
+    assert provider.refresh(["USD"]) == {"USD": 1350.0}
+
+    rates_file.write_text(json.dumps({"USD": 1400.0}), encoding="utf-8")
+    backend.gate.clear()
+    # 만료된 값이 즉시 돌아오고, 갱신은 백그라운드에서 대기 중
+    assert provider.get_rates(["USD"]) == {"USD": 1350.0}
+    assert provider.get_rates(["USD"]) == {"USD": 1350.0}
+
+    backend.gate.set()
+    assert wait_until(lambda: provider.get_rates(["USD"]) == {"USD": 1400.0})
+
+
+def test_failure_keeps_last_value(rates_file, make_provider):
+    provider = make_provider(FileRateBackend(rates_file))
+    assert provider.refresh(["USD"]) == {"USD": 1350.0}
+
+    rates_file.write_text("{not json", encoding="utf-8")
+    assert provider.refresh(["USD"]) == {"USD": 1350.0}
+    assert "USD" in provider.last_errors()
+
+
+@pytest.mark.parametrize("bad", ["NaN", "Infinity", "0", "-1", "null", '"abc"'])
+def test_invalid_rate_is_rejected(tmp_path, make_provider, bad):
+    path = tmp_path / "fx_rates.json"
+    path.write_text('{"USD": 1350.0}', encoding="utf-8")
+    provider = make_provider(FileRateBackend(path))
+    assert provider.refresh(["USD"]) == {"USD": 1350.0}
+
+    path.write_text('{"USD": %s}' % bad, encoding="utf-8")
+    assert provider.refresh(["USD"]) == {"USD": 1350.0}
+    assert "USD" in provider.last_errors()
+
+
+def test_retry_backoff_after_failure(rates_file, make_provider):
+    backend = GatedFileBackend(rates_file)
+    provider = make_provider(backend, retry_after=60.0)
+
+    assert provider.get_rates(["EUR"]) == {}
+    assert wait_until(lambda: "EUR" in provider.last_errors())
+    assert backend.calls == 1
+
+    # back-off 동안에는 다시 요청하지 않음
+    for _ in range(5):
+        assert provider.get_rates(["EUR"]) == {}
+    time.sleep(0.05)
+    assert backend.calls == 1
+
+    provider.retry_after = 0.0
+    provider.get_rates(["EUR"])
+    assert wait_until(lambda: backend.calls == 2)
+
+
+def test_max_age_drops_old_value_and_status_reports_it(rates_file, make_provider):
+    provider = make_provider(FileRateBackend(rates_file), ttl=0.0, retry_after=60.0, max_age=0.05)
+    assert provider.refresh(["USD"]) == {"USD": 1350.0}
+
+    rates_file.write_text("{not json", encoding="utf-8")
+    time.sleep(0.1)
+    # 갱신이 실패하고 있고 값이 max_age보다 오래됨 → 수동 입력값으로
+    assert provider.get_rates(["USD"]) == {}
+    assert wait_until(lambda: provider.status(["USD"])["USD"]["error"])
+    status = provider.status(["USD"])["USD"]
+    assert status["rate"] == 1350.0 and status["expired"] and status["age"] >= 0.05
+
+
+def test_status_for_fresh_and_missing(rates_file, make_provider):
+    provider = make_provider(FileRateBackend(rates_file))
+    provider.refresh(["USD"])
+    status = provider.status(["USD", "JPY"])
+    assert status["USD"]["age"] < 1.0 and not status["USD"]["expired"] and status["USD"]["error"] is None
+    assert status["JPY"] == {"rate": None, "age": None, "expired": False, "error": None}
+
+
+def test_file_backend_reads_once_per_change(rates_file, make_provider, monkeypatch):
+    backend = FileRateBackend(rates_file)
+    reads = []
+    read_text = type(rates_file).read_text
+
+    def counting_read_text(self, *args, **kwargs):
+        reads.append(self)
+        return read_text(self, *args, **kwargs)
+
+    monkeypatch.setattr(type(rates_file), "read_text", counting_read_text)
+    provider = make_provider(backend)
+    assert provider.refresh(["USD", "JPY"]) == {"USD": 1350.0, "JPY": 9.2}
+    assert provider.refresh(["USD", "JPY"]) == {"USD": 1350.0, "JPY": 9.2}
+    assert len(reads) == 1
+
+    rates_file.write_text(json.dumps({"USD": 1400.0, "JPY": 9.5, "EUR": 1}), encoding="utf-8")
+    assert provider.refresh(["USD", "JPY"]) == {"USD": 1400.0, "JPY": 9.5}
+    assert len(reads) == 2
+
+
+# -------------------------------
+# HttpRateBackend: 127.0.0.1 로컬 스텁 서버
+# -------------------------------
+@pytest.fixture
+def http_stub():
+    responses = {}
+
+    class Handler(http.server.BaseHTTPRequestHandler):
+        def do_GET(self):
+            currency = self.path.strip("/")
+            if currency not in responses:
+                self.send_response(404)
+                self.end_headers()
+                return
+            body = json.dumps(responses[currency]).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}/{{currency}}", responses
+    server.shutdown()
+    server.server_close()
+    thread.join()
+
+
+def test_http_backend_response_shapes(http_stub, make_provider):
+    url, responses = http_stub
+    responses.update({"USD": 1350.5, "JPY": {"rate": 9.2}, "EUR": {"EUR": 1450.0}})
+    provider = make_provider(HttpRateBackend(url))
+    assert provider.refresh(["USD", "JPY", "EUR"]) == {"USD": 1350.5, "JPY": 9.2, "EUR": 1450.0}
+
+
+@pytest.mark.parametrize("body", [{"other": 1.0}, "abc", {"rate": -5}, None])
+def test_http_backend_bad_response_is_failure(http_stub, make_provider, body):
+    url, responses = http_stub
+    responses["USD"] = 1350.0
+    provider = make_provider(HttpRateBackend(url))
+    assert provider.refresh(["USD"]) == {"USD": 1350.0}
+
+    responses["USD"] = body
+    assert provider.refresh(["USD"]) == {"USD": 1350.0}
+    assert "USD" in provider.last_errors()
+
+
+def test_http_backend_404_is_failure(http_stub, make_provider):
+    url, _ = http_stub
+    provider = make_provider(HttpRateBackend(url, timeout=2.0))
+    assert provider.refresh(["USD"]) == {}
+    assert "HTTPError" in provider.last_errors()["USD"]
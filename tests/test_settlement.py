@@ -0,0 +1,151 @@
+import random
+from collections import defaultdict
+
+import pandas as pd
+import pytest
+
+from settlement import compute_settlement_timeline, timeline_balance_col
+
+
+# -------------------------------
+# 기준 구현: 타임라인 도입 전 app.py의 compute_settlement (그대로 복사)
+# -------------------------------
+def baseline_split_amount_exact(amount: int, people: list[str]) -> dict[str, int]:
+    n = len(people)
+    if n <= 0:
+        return {}
+    base = amount // n
+    rem = amount % n
+    shares = {p: base for p in people}
+    for i in range(rem):
+        shares[people[i]] += 1
+    return shares
+
+
+def baseline_compute_settlement(participants: list[str], expenses: list[dict]):
+    paid = defaultdict(int)
+    owed = defaultdict(int)
+
+    for e in expenses:
+        amt = int(e.get("amount_krw", 0))
+        payer = e.get("payer", "")
+        display_ps = e.get("participants", [])
+        payer_only = bool(e.get("payer_only", False))
+        beneficiary = (e.get("beneficiary") or "").strip()
+
+        if beneficiary:
+            split_ps = [beneficiary]
+        elif payer_only:
+            split_ps = [payer]
+        else:
+            split_ps = display_ps
+
+        if not split_ps:
+            continue
+
+        paid[payer] += amt
+        shares = baseline_split_amount_exact(amt, split_ps)
+        for p, s in shares.items():
+            owed[p] += s
+
+    rows = []
+    for p in participants:
+        rows.append({
+            "이름": p,
+            "낸 금액": int(paid[p]),
+            "부담금": int(owed[p]),
+            "차액(낸-부담)": int(paid[p] - owed[p]),
+        })
+    summary_df = pd.DataFrame(rows)
+
+    senders = []
+    receivers = []
+    for r in rows:
+        diff = r["차액(낸-부담)"]
+        if diff < 0:
+            senders.append([r["이름"], -diff])
+        elif diff > 0:
+            receivers.append([r["이름"], diff])
+
+    transfers = []
+    i = j = 0
+    while i < len(senders) and j < len(receivers):
+        s_name, s_amt = senders[i]
+        r_name, r_amt = receivers[j]
+        send = min(s_amt, r_amt)
+        transfers.append({"보내는 사람": s_name, "받는 사람": r_name, "금액(원)": int(send)})
+        senders[i][1] -= send
+        receivers[j][1] -= send
+        if senders[i][1] == 0:
+            i += 1
+        if receivers[j][1] == 0:
+            j += 1
+
+    transfers_df = pd.DataFrame(transfers) if transfers else pd.DataFrame(columns=["보내는 사람", "받는 사람", "금액(원)"])
+    return summary_df, transfers_df
+
+
+def random_trip(rng: random.Random):
+    participants = rng.sample(["엄마", "아빠", "민수", "지수", "할머니", "날짜", "송금 안내"], rng.randint(1, 6))
+    days = [f"2026-03-{d:02d}" for d in range(1, rng.randint(2, 8))]
+    expenses = []
+    for _ in range(rng.randint(0, 25)):
+        payer = rng.choice(participants)
+        mode = rng.random()
+        expenses.append({
+            "date": rng.choice(days),
+            "payer": payer,
+            "amount_krw": rng.randint(1, 200_000),
+            "participants": rng.sample(participants, rng.randint(0, len(participants))),
+            "payer_only": mode < 0.15,
+            "beneficiary": rng.choice(participants) if 0.15 <= mode < 0.3 else "",
+        })
+    return participants, expenses
+
+
+def transfer_text(transfers_df: pd.DataFrame) -> str:
+    return " / ".join(
+        f"{r['보내는 사람']}→{r['받는 사람']} {r['금액(원)']:,}" for r in transfers_df.to_dict("records")
+    )
+
+
+@pytest.mark.parametrize("seed", range(200))
+def test_final_result_matches_baseline(seed):
+    participants, expenses = random_trip(random.Random(seed))
+    summary_df, transfers_df, _ = compute_settlement_timeline(participants, expenses)
+    base_summary, base_transfers = baseline_compute_settlement(participants, expenses)
+
+    pd.testing.assert_frame_equal(summary_df, base_summary)
+    assert transfers_df.to_dict("records") == base_transfers.to_dict("records")
+
+
+@pytest.mark.parametrize("seed", range(200))
+def test_each_day_matches_settlement_up_to_that_day(seed):
+    participants, expenses = random_trip(random.Random(seed))
+    _, _, timeline_df = compute_settlement_timeline(participants, expenses)
+
+    days = sorted({e["date"] for e in expenses if e["participants"] or e["payer_only"] or e["beneficiary"]})
+    assert list(timeline_df["날짜"]) == days
+    for row in timeline_df.to_dict("records"):
+        upto = [e for e in expenses if e["date"] <= row["날짜"]]
+        base_summary, base_transfers = baseline_compute_settlement(participants, upto)
+        for r in base_summary.to_dict("records"):
+            assert row[timeline_balance_col(r["이름"])] == r["차액(낸-부담)"]
+        assert row["송금 안내"] == transfer_text(base_transfers)
+
+
+def test_empty_trip():
+    summary_df, transfers_df, timeline_df = compute_settlement_timeline(["엄마", "날짜"], [])
+    assert list(summary_df["차액(낸-부담)"]) == [0, 0]
+    assert transfers_df.empty
+    assert timeline_df.empty
+    assert list(timeline_df.columns) == ["날짜", "엄마 차액", "날짜 차액", "송금 안내"]
+
+
+def test_participant_named_like_fixed_column_does_not_overwrite_it():
+    expenses = [{"date": "2026-03-01", "payer": "날짜", "amount_krw": 1000, "participants": ["날짜", "송금 안내"]}]
+    _, _, timeline_df = compute_settlement_timeline(["날짜", "송금 안내"], expenses)
+    row = timeline_df.to_dict("records")[0]
+    assert row["날짜"] == "2026-03-01"
+    assert row["날짜 차액"] == 500 and row["송금 안내 차액"] == -500
+    assert row["송금 안내"] == "송금 안내→날짜 500"
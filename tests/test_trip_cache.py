@@ -0,0 +1,229 @@
+import copy
+import threading
+import uuid
+
+from trip_cache import TripCache, deep_sizeof, own_trip, share_snapshot
+
+
+def make_trip():
+    participants = ["엄마", "아빠"]
+    expenses = [
+        {"id": "e1", "date": "2026-01-01", "payer": "엄마", "amount_krw": 10000, "participants": ["엄마", "아빠"]},
+        {"id": "e2", "date": "2026-01-02", "payer": "아빠", "amount_krw": 5000, "participants": ["아빠"]},
+    ]
+    return participants, expenses
+
+
+def open_sessions(cache):
+    snap = cache.intern(*make_trip())
+    a, b = {}, {}
+    share_snapshot(a, snap)
+    share_snapshot(b, snap)
+    return snap, a, b
+
+
+# -------------------------------
+# copy-on-write
+# -------------------------------
+def test_sessions_share_snapshot_lists():
+    snap, a, b = open_sessions(TripCache())
+    assert a["expenses"] is b["expenses"] is snap.expenses
+    assert a["trip_shared"] and b["trip_shared"]
+
+
+def test_add_does_not_leak_into_other_session():
+    snap, a, b = open_sessions(TripCache())
+    before = copy.deepcopy(snap.expenses)
+
+    own_trip(a)
+    a["expenses"].append({"id": "e3", "amount_krw": 1, "participants": ["엄마"]})
+    a["participants"].append("민수")
+
+    assert snap.expenses == before and b["expenses"] is snap.expenses
+    assert snap.participants == ["엄마", "아빠"]
+    assert not a["trip_shared"]
+
+
+def test_edit_does_not_leak_into_other_session():
+    snap, a, b = open_sessions(TripCache())
+    before = copy.deepcopy(snap.expenses)
+
+    own_trip(a)
+    # 앱과 같은 방식: 항목 교체 + 필드 수정 + 중첩 리스트는 통째로 교체
+    a["expenses"][0] = {**a["expenses"][0], "amount_krw": 99999}
+    a["expenses"][1]["memo"] = "수정"
+    a["expenses"][1]["participants"] = ["엄마"]
+
+    assert snap.expenses == before
+    assert b["expenses"] == before
+
+
+def test_delete_does_not_leak_into_other_session():
+    snap, a, b = open_sessions(TripCache())
+    own_trip(a)
+    a["expenses"] = [e for e in a["expenses"] if e["id"] != "e1"]
+    assert [e["id"] for e in snap.expenses] == ["e1", "e2"]
+    assert [e["id"] for e in b["expenses"]] == ["e1", "e2"]
+
+
+def test_own_trip_is_noop_when_not_shared():
+    state = {"participants": ["a"], "expenses": [{"id": "1"}], "trip_shared": False}
+    expenses = state["expenses"]
+    own_trip(state)
+    assert state["expenses"] is expenses
+
+
+def test_edited_trip_interns_to_new_snapshot():
+    cache = TripCache()
+    snap, a, _ = open_sessions(cache)
+    own_trip(a)
+    a["expenses"].pop()
+    edited = cache.intern(a["participants"], a["expenses"])
+    assert edited is not snap
+    # 같은 내용으로 되돌리면 기존 스냅샷을 다시 공유
+    assert cache.intern(*make_trip()) is snap
+
+
+# -------------------------------
+# 파생 결과 / 메모리 계산 / 제거
+# -------------------------------
+def test_derive_computes_once():
+    cache = TripCache()
+    snap = cache.intern(*make_trip())
+    calls = []
+    for _ in range(3):
+        cache.derive(snap, "x", lambda: calls.append(1) or b"x" * 10)
+    assert calls == [1]
+
+
+def test_nbytes_counts_real_size_and_shared_lists_once():
+    cache = TripCache()
+    participants, expenses = make_trip()
+    cache.intern(participants, expenses)
+    one = cache.stats()["nbytes"]
+    assert one >= deep_sizeof(participants) + deep_sizeof(expenses)
+
+    # 지출만 다른 스냅샷은 참여자 리스트를 공유 → 참여자 리스트 크기는 다시 안 셈
+    more = expenses + [{"id": "e3", "amount_krw": 1}]
+    cache.intern(participants, more)
+    assert cache.stats()["nbytes"] - one == deep_sizeof(more)
+
+
+def test_lru_eviction_and_accounting_returns_to_live_size():
+    cache = TripCache(max_bytes=20000)
+    a = cache.intern(["a"], [])
+    cache.derive(a, "x", lambda: b"x" * 12000)
+    b = cache.intern(["b"], [])
+    cache.derive(b, "x", lambda: b"x" * 12000)
+
+    assert cache.stats()["entries"] == 1
+    empty = TripCache()
+    empty.intern(["b"], [])
+    assert cache.stats()["nbytes"] == empty.stats()["nbytes"] + 12000
+
+
+def test_derive_on_stale_snapshot_uses_live_entry():
+    cache = TripCache(max_bytes=20000)
+    old_a = cache.intern(["a"], [])
+    cache.derive(old_a, "x", lambda: b"x" * 12000)
+    b = cache.intern(["b"], [])
+    cache.derive(b, "x", lambda: b"x" * 12000)  # old_a 제거
+    new_a = cache.intern(["a"], [])  # 다른 세션이 같은 내용을 다시 등록
+    assert new_a is not old_a
+
+    assert cache.derive(old_a, "y", lambda: b"y" * 3000) == b"y" * 3000
+    assert "y" in new_a.derived and "y" not in old_a.derived
+
+    # 누적 크기가 실제로 남아있는 항목들의 크기와 정확히 일치 (떠도는 바이트 없음)
+    live = [cache._entries[k] for k in cache._entries]
+    baseline = TripCache()
+    for s in live:
+        baseline.intern(s.participants, s.expenses)
+    assert cache.stats()["nbytes"] == baseline.stats()["nbytes"] + sum(s.derived_nbytes for s in live)
+
+
+def test_evicted_snapshot_is_reinserted_on_derive():
+    cache = TripCache(max_bytes=20000)
+    a = cache.intern(["a"], [])
+    cache.derive(a, "x", lambda: b"x" * 12000)
+    b = cache.intern(["b"], [])
+    cache.derive(b, "x", lambda: b"x" * 12000)
+
+    cache.derive(a, "y", lambda: b"y")
+    assert cache._entries.get(a.key) is a
+
+
+def test_load_aliases_and_pruning():
+    cache = TripCache(max_bytes=1)
+    calls = []
+
+    def loader(i):
+        def load():
+            calls.append(i)
+            return f"trip{i}", [f"p{i}"], []
+        return load
+
+    s0, _ = cache.load("sig0", loader(0))
+    assert cache.load("sig0", loader(0)) == (s0, "trip0")
+    assert calls == [0]
+
+    for i in range(1, 10):
+        cache.load(f"sig{i}", loader(i))
+    # max_bytes=1이라 항목은 1개만 남고, 죽은 별칭은 정리됨
+    stats = cache.stats()
+    assert stats["entries"] == 1
+    assert stats["aliases"] <= 4
+
+
+# -------------------------------
+# 여행 이름은 키에 포함되지 않음
+# -------------------------------
+def test_renaming_trip_keeps_snapshot_and_derived_results():
+    cache = TripCache()
+    snap = cache.intern(*make_trip())
+    calls = []
+    cache.derive(snap, "settlement", lambda: calls.append(1) or b"s")
+    assert cache.intern(*make_trip()) is snap
+    cache.derive(snap, "settlement", lambda: calls.append(1) or b"s")
+    assert calls == [1]
+    assert cache.stats()["entries"] == 1
+
+
+def test_variant_replaces_save_bytes_instead_of_accumulating():
+    cache = TripCache()
+    snap = cache.intern(*make_trip())
+    base = cache.stats()["nbytes"]
+
+    assert cache.derive(snap, "save", lambda: b"A" * 100, variant="여행 A") == b"A" * 100
+    assert cache.derive(snap, "save", lambda: 1 / 0, variant="여행 A") == b"A" * 100
+    assert cache.derive(snap, "save", lambda: b"B" * 30, variant="여행 B") == b"B" * 30
+    assert cache.stats()["nbytes"] == base + 30
+    assert snap.derived_nbytes == 30
+
+
+def test_load_returns_file_name_per_alias():
+    cache = TripCache()
+    snap1, name1 = cache.load("sig1", lambda: ("이름 1", *make_trip()))
+    snap2, name2 = cache.load("sig2", lambda: ("이름 2", *make_trip()))
+    assert snap1 is snap2
+    assert (name1, name2) == ("이름 1", "이름 2")
+
+
+def test_concurrent_load_of_same_file_shares_one_snapshot():
+    cache = TripCache()
+    barrier = threading.Barrier(2)
+
+    def loader():
+        # 두 세션 모두 loader를 실행하고, 각자 다른 uuid를 만든 상황
+        barrier.wait(timeout=5)
+        return "여행", ["엄마"], [{"id": uuid.uuid4().hex, "amount_krw": 1000}]
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.load("same", loader))) for _ in range(2)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert results[0][0] is results[1][0]
+    assert cache.stats()["entries"] == 1
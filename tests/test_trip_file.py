@@ -0,0 +1,48 @@
+import gzip
+import json
+
+import pytest
+
+from trip_file import TripFileError, build_save_bytes, load_trip_bytes
+
+PARTICIPANTS = ["엄마", "아빠"]
+EXPENSES = [
+    {"id": "e1", "date": "2026-01-01", "payer": "엄마", "amount_krw": 12000, "participants": ["엄마", "아빠"], "memo": "점심 🍜"},
+]
+
+
+@pytest.mark.parametrize("compressed", [False, True])
+def test_save_round_trip(compressed):
+    raw = build_save_bytes("가족 여행", PARTICIPANTS, EXPENSES, compressed=compressed)
+    assert raw[:2] == b"\x1f\x8b" if compressed else raw.startswith(b"{")
+    assert load_trip_bytes(raw) == {"trip_name": "가족 여행", "participants": PARTICIPANTS, "expenses": EXPENSES}
+
+
+def test_compressed_save_is_compact_and_deterministic():
+    a = build_save_bytes("t", PARTICIPANTS, EXPENSES, compressed=True)
+    b = build_save_bytes("t", PARTICIPANTS, EXPENSES, compressed=True)
+    assert a == b
+    assert b"\n" not in gzip.decompress(a)
+
+
+def test_size_cap_applies_to_decompressed_size():
+    bomb = gzip.compress(b" " * 10_000)
+    with pytest.raises(TripFileError):
+        load_trip_bytes(bomb, max_bytes=1000)
+    with pytest.raises(TripFileError):
+        load_trip_bytes(b" " * 2000, max_bytes=1000)
+
+
+@pytest.mark.parametrize("raw", [
+    b"\x1f\x8bnot really gzip",
+    gzip.compress(b'{"trip_name": "t"}')[:-6],  # 잘린 파일
+    gzip.compress("{}".encode("utf-16")),
+    b"\xff\xfe",
+    b"{not json",
+    b"[1, 2]",
+    json.dumps({"expenses": [1]}).encode(),
+    json.dumps({"participants": "엄마"}).encode(),
+])
+def test_bad_files_raise_trip_file_error(raw):
+    with pytest.raises(TripFileError):
+        load_trip_bytes(raw)
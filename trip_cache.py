@@ -0,0 +1,246 @@
+import hashlib
+import json
+import sys
+import threading
+from collections import OrderedDict
+from io import BytesIO
+
+# -------------------------------
+# 메모리 크기 추정
+# -------------------------------
+def estimate_nbytes(obj) -> int:
+    """파생 결과(DataFrame/bytes/튜플 등)의 대략적인 메모리 크기."""
+    if obj is None:
+        return 0
+    if isinstance(obj, (bytes, bytearray)):
+        return len(obj)
+    if isinstance(obj, BytesIO):
+        return obj.getbuffer().nbytes
+    if hasattr(obj, "memory_usage"):
+        usage = obj.memory_usage(deep=True)
+        return int(usage.sum()) if hasattr(usage, "sum") else int(usage)
+    if isinstance(obj, (tuple, list)):
+        return sum(estimate_nbytes(x) for x in obj)
+    if isinstance(obj, dict):
+        return sum(estimate_nbytes(v) for v in obj.values())
+    return sys.getsizeof(obj)
+
+
+def deep_sizeof(obj, seen: set | None = None) -> int:
+    """list/dict/str/숫자로 된 여행 데이터가 실제로 차지하는 메모리 (같은 객체는 한 번만)."""
+    if seen is None:
+        seen = set()
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(deep_sizeof(k, seen) + deep_sizeof(v, seen) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple, set)):
+        size += sum(deep_sizeof(x, seen) for x in obj)
+    return size
+
+
+def trip_content_key(participants: list, expenses: list) -> str:
+    """여행 내용의 해시 키. 여행 이름은 정산/통계/내보내기에 쓰이지 않으므로 제외."""
+    canonical = json.dumps(
+        {"participants": participants, "expenses": expenses},
+        ensure_ascii=False,
+        sort_keys=True,
+        separators=(",", ":"),
+    ).encode("utf-8")
+    return hashlib.sha256(canonical).hexdigest()
+
+
+# -------------------------------
+# 여행 스냅샷
+# -------------------------------
+class TripSnapshot:
+    """여러 세션이 함께 보는 불변 여행 데이터(참여자/지출) + 파생 결과.
+
+    participants/expenses 리스트와 그 안의 dict는 읽기 전용으로 취급한다.
+    수정하려는 세션은 먼저 자기 사본을 만들어야 한다(copy-on-write).
+    """
+
+    __slots__ = ("key", "participants", "expenses", "derived", "derived_nbytes")
+
+    def __init__(self, key: str, participants: list, expenses: list):
+        self.key = key
+        self.participants = participants
+        self.expenses = expenses
+        self.derived = {}
+        self.derived_nbytes = 0
+
+    @property
+    def own_nbytes(self) -> int:
+        # participants/expenses 리스트는 스냅샷끼리 공유될 수 있어 TripCache가 따로 센다
+        return self.derived_nbytes
+
+
+# -------------------------------
+# 프로세스 공용 캐시
+# -------------------------------
+class TripCache:
+    """여행 내용 해시 → 스냅샷. 전체 크기가 max_bytes를 넘으면 오래 안 쓴 것부터 제거."""
+
+    def __init__(self, max_bytes: int = 256 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self._entries: OrderedDict[str, TripSnapshot] = OrderedDict()
+        # 업로드 파일 서명 → (스냅샷 키, 파일 속 여행 이름)
+        self._aliases: dict[str, tuple[str, str]] = {}
+        # id(list) → [참조 스냅샷 수, 크기]: 같은 리스트를 가리키는 스냅샷이 여럿이어도 한 번만 셈
+        self._shared: dict[int, list[int]] = {}
+        self._nbytes = 0
+        self._lock = threading.Lock()
+
+    def intern(self, participants: list, expenses: list) -> TripSnapshot:
+        """같은 내용의 스냅샷이 있으면 그것을, 없으면 주어진 리스트로 새 스냅샷을 돌려준다."""
+        key = trip_content_key(participants, expenses)
+        with self._lock:
+            return self._intern_locked(key, participants, expenses)
+
+    def load(self, source_sig: str, loader) -> tuple[TripSnapshot, str]:
+        """업로드 파일 서명으로 (스냅샷, 여행 이름) 조회. 처음 보는 파일이면 loader()로 만든다.
+
+        loader()는 (여행 이름, 참여자, 지출)을 돌려준다. 같은 파일을 두 세션이
+        동시에 올려 loader()가 두 번 돌아도(지출 id가 달라도) 먼저 등록된
+        스냅샷을 함께 쓴다.
+        """
+        with self._lock:
+            hit = self._alias_locked(source_sig)
+            if hit is not None:
+                return hit
+        trip_name, participants, expenses = loader()
+        key = trip_content_key(participants, expenses)
+        with self._lock:
+            hit = self._alias_locked(source_sig)
+            if hit is not None:
+                return hit
+            snap = self._intern_locked(key, participants, expenses)
+            self._aliases[source_sig] = (snap.key, trip_name)
+            if len(self._aliases) > 4 * max(len(self._entries), 1):
+                self._aliases = {s: a for s, a in self._aliases.items() if a[0] in self._entries}
+            return snap, trip_name
+
+    def derive(self, snap: TripSnapshot, name, compute, variant=None):
+        """스냅샷의 파생 결과(정산/통계/내보내기)를 한 번만 계산해 공유.
+
+        variant는 스냅샷 밖의 입력(예: 저장 파일의 여행 이름)이다. 저장된 값과
+        variant가 다르면 다시 계산해 바꿔 넣으므로 이름별 사본이 쌓이지 않는다.
+
+        세션이 들고 있는 snap이 이미 제거됐고 같은 내용이 다른 객체로 다시
+        등록돼 있으면, 결과는 현재 캐시에 있는 스냅샷에 저장한다.
+        """
+        with self._lock:
+            target = self._entries.get(snap.key) or snap
+            hit = target.derived.get(name)
+            if hit is not None and hit[0] == variant:
+                if self._entries.get(target.key) is target:
+                    self._entries.move_to_end(target.key)
+                return hit[1]
+
+        value = compute()
+        nbytes = estimate_nbytes(value)
+
+        with self._lock:
+            target = self._entries.get(snap.key)
+            if target is None:
+                # 제거된 뒤에도 세션이 들고 있던 스냅샷이면 다시 등록
+                target = snap
+                self._insert(target)
+            hit = target.derived.get(name)
+            if hit is not None:
+                if hit[0] == variant:
+                    return hit[1]
+                target.derived_nbytes -= hit[2]
+                self._nbytes -= hit[2]
+            target.derived[name] = (variant, value, nbytes)
+            target.derived_nbytes += nbytes
+            self._nbytes += nbytes
+            self._entries.move_to_end(target.key)
+            self._evict(keep=target.key)
+        return value
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "aliases": len(self._aliases),
+                "nbytes": self._nbytes,
+                "max_bytes": self.max_bytes,
+            }
+
+    def _intern_locked(self, key: str, participants: list, expenses: list) -> TripSnapshot:
+        snap = self._entries.get(key)
+        if snap is not None:
+            self._entries.move_to_end(key)
+            return snap
+        snap = TripSnapshot(key, participants, expenses)
+        self._insert(snap)
+        return snap
+
+    def _alias_locked(self, source_sig: str):
+        alias = self._aliases.get(source_sig)
+        snap = self._entries.get(alias[0]) if alias else None
+        if snap is None:
+            return None
+        self._entries.move_to_end(snap.key)
+        return snap, alias[1]
+
+    def _insert(self, snap: TripSnapshot):
+        self._entries[snap.key] = snap
+        self._nbytes += snap.own_nbytes + self._retain(snap.participants) + self._retain(snap.expenses)
+        self._evict(keep=snap.key)
+
+    def _remove(self, key: str):
+        old = self._entries.pop(key)
+        self._nbytes -= old.own_nbytes + self._release(old.participants) + self._release(old.expenses)
+
+    def _retain(self, obj) -> int:
+        # 캐시가 참조를 들고 있는 동안 id가 재사용되지 않으므로 id로 공유 여부 판단
+        entry = self._shared.get(id(obj))
+        if entry is not None:
+            entry[0] += 1
+            return 0
+        nbytes = deep_sizeof(obj)
+        self._shared[id(obj)] = [1, nbytes]
+        return nbytes
+
+    def _release(self, obj) -> int:
+        entry = self._shared[id(obj)]
+        entry[0] -= 1
+        if entry[0] > 0:
+            return 0
+        del self._shared[id(obj)]
+        return entry[1]
+
+    def _evict(self, keep: str):
+        while self._nbytes > self.max_bytes and len(self._entries) > 1:
+            key = next(iter(self._entries))
+            if key == keep:
+                self._entries.move_to_end(key)
+                key = next(iter(self._entries))
+            self._remove(key)
+
+
+# -------------------------------
+# 세션 copy-on-write (state: st.session_state 또는 dict)
+# -------------------------------
+def share_snapshot(state, snap: TripSnapshot):
+    """세션이 스냅샷의 리스트를 그대로 가리키게 한다(복사 없음)."""
+    state["participants"] = snap.participants
+    state["expenses"] = snap.expenses
+    state["trip_shared"] = True
+
+
+def own_trip(state):
+    """공유 중이면 수정 전에 세션 전용 사본을 만든다.
+
+    지출 dict는 얕은 복사(dict(e))라 e["participants"] 같은 중첩 리스트는
+    스냅샷과 공유된다. 앱은 이런 값을 항상 새 리스트로 통째로 바꾸며, 제자리
+    수정(append 등)을 하면 다른 세션의 데이터가 바뀌므로 하면 안 된다.
+    """
+    if state.get("trip_shared"):
+        state["participants"] = list(state["participants"])
+        state["expenses"] = [dict(e) for e in state["expenses"]]
+        state["trip_shared"] = False
@@ -0,0 +1,59 @@
+import gzip
+import json
+import zlib
+from io import BytesIO
+
+# 압축 해제 후 허용하는 최대 크기 (여러 세션이 같은 서버를 쓰므로 gzip 폭탄 방지)
+MAX_TRIP_FILE_BYTES = 20 * 1024 * 1024
+
+
+class TripFileError(ValueError):
+    """여행 파일을 읽을 수 없을 때. 메시지는 그대로 사용자에게 보여준다."""
+
+
+def to_json_bytes(data: dict, compact: bool = False) -> BytesIO:
+    buf = BytesIO()
+    if compact:
+        text = json.dumps(data, ensure_ascii=False, separators=(",", ":"))
+    else:
+        text = json.dumps(data, ensure_ascii=False, indent=2)
+    buf.write(text.encode("utf-8"))
+    buf.seek(0)
+    return buf
+
+
+def build_save_bytes(trip_name: str, participants: list, expenses: list, compressed: bool = False) -> bytes:
+    payload = {
+        "trip_name": trip_name,
+        "participants": participants,
+        "expenses": expenses,
+    }
+    if compressed:
+        return gzip.compress(to_json_bytes(payload, compact=True).getvalue(), mtime=0)
+    return to_json_bytes(payload).getvalue()
+
+
+def load_trip_bytes(raw: bytes, max_bytes: int = MAX_TRIP_FILE_BYTES) -> dict:
+    # gzip 매직 바이트면 압축 해제 후 파싱 (일반 JSON도 그대로 허용)
+    if raw[:2] == b"\x1f\x8b":
+        try:
+            with gzip.GzipFile(fileobj=BytesIO(raw)) as gz:
+                # 한도 + 1바이트까지만 풀어서 초과 여부만 확인
+                raw = gz.read(max_bytes + 1)
+        except (OSError, EOFError, zlib.error) as e:
+            raise TripFileError("압축 파일이 손상되었습니다.") from e
+    if len(raw) > max_bytes:
+        raise TripFileError(f"여행 파일이 너무 큽니다. (최대 {max_bytes // (1024 * 1024)}MB)")
+
+    try:
+        data = json.loads(raw.decode("utf-8"))
+    except (UnicodeDecodeError, json.JSONDecodeError) as e:
+        raise TripFileError("여행 파일(JSON) 형식이 올바르지 않습니다.") from e
+    if (
+        not isinstance(data, dict)
+        or not isinstance(data.get("participants", []), list)
+        or not isinstance(data.get("expenses", []), list)
+        or not all(isinstance(e, dict) for e in data.get("expenses", []))
+    ):
+        raise TripFileError("여행 파일(JSON) 형식이 올바르지 않습니다.")
+    return data